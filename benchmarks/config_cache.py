@@ -0,0 +1,48 @@
+"""
+Measures config loading time with and without the compiled config cache
+
+Usage: python -m benchmarks.config_cache [DEVICES] [OBJECTS_PER_DEVICE]
+"""
+from os.path import join
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable
+
+from telegrafbacnet import _load_config, _parse_config
+
+
+def _write_config(path: str, devices: int, objects: int) -> None:
+    with open(path, "w", encoding="utf-8") as config:
+        for device in range(devices):
+            config.write("[[device]]\n"
+                         f"address = \"10.0.{device // 256}.{device % 256}\"\n"
+                         f"device_identifier = {device}\n")
+            for obj in range(objects):
+                config.write("[[device.objects]]\n"
+                             f"object_identifier = \"analogInput:{obj}\"\n"
+                             "properties = [\"presentValue\", "
+                             "\"statusFlags\"]\n")
+
+
+def _measure(name: str, func: Callable[..., Any], *args: Any) -> None:
+    start = perf_counter()
+    func(*args)
+    print(f"{name:<20} {(perf_counter() - start) * 1000:>10.1f} ms")
+
+
+def main() -> None:
+    devices = int(argv[1]) if len(argv) > 1 else 100
+    objects = int(argv[2]) if len(argv) > 2 else 100
+    with TemporaryDirectory() as tmp_dir:
+        config_path = join(tmp_dir, "config.toml")
+        cache_path = join(tmp_dir, "config.cache")
+        _write_config(config_path, devices, objects)
+        print(f"{devices} devices, {devices * objects} objects")
+        _measure("parse", _parse_config, config_path)
+        _measure("parse and store", _load_config, config_path, cache_path)
+        _measure("cached", _load_config, config_path, cache_path)
+
+
+if __name__ == "__main__":
+    main()
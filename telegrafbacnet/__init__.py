@@ -2,18 +2,49 @@ from argparse import ArgumentParser
 import logging
 from os.path import isdir
 from sys import stderr
+from urllib.parse import urlsplit
 
 from bacpypes.core import run
 
 from tomlconfig import ConfigError, parse
 
 from .app import TelegrafApplication
+from .cache import (
+    config_sources,
+    fingerprint_sources,
+    load_config_cache,
+    store_config_cache,
+)
 from .config import Config
+from .profiling import Profiler
 
 
 _logger = logging.getLogger(__name__)
 
 
+def _parse_config(config_path: str) -> Config:
+    try:
+        return parse(Config, conf_d_path=config_path) \
+            if isdir(config_path) else parse(Config, conf_path=config_path)
+    except FileNotFoundError as ex:
+        raise ConfigError("No configuration!") from ex
+
+
+def _load_config(config_path: str, cache_path: str) -> Config:
+    sources = config_sources(config_path)
+    config = load_config_cache(cache_path, sources)
+    if config is not None:
+        _logger.debug("Loaded config from cache %r", cache_path)
+        return config
+    try:
+        fingerprints = fingerprint_sources(sources)
+    except FileNotFoundError as ex:
+        raise ConfigError("No configuration!") from ex
+    config = _parse_config(config_path)
+    store_config_cache(cache_path, fingerprints, config)
+    return config
+
+
 def main() -> None:
     parser = ArgumentParser("Telegraf plugin for BACnet")
     parser.add_argument("--debug", help="Show debug output on stderr",
@@ -22,27 +53,62 @@ def main() -> None:
                         help="Load config from the file CONFIG or load config "
                         "from files in the directory CONFIG in alphabetical "
                         "order")
+    parser.add_argument("--config-cache",
+                        help="Store the parsed config in the file "
+                        "CONFIG_CACHE and load it from there on later starts "
+                        "while the files in CONFIG are unchanged, the cache "
+                        "is executable code and must not be writable by "
+                        "other users")
     args = parser.parse_args()
+    if args.config_cache is not None and args.config is None:
+        parser.error("--config-cache requires --config")
+
+    log_handler = logging.StreamHandler(stderr)
+    log_handler.setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"),
+    )
+    _logger.addHandler(log_handler)
+    _logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
 
     if args.config is None:
         config = parse(Config, conf_d_path=args.config)
+    elif args.config_cache is None:
+        config = _parse_config(args.config)
     else:
-        try:
-            config = parse(Config, conf_d_path=args.config) \
-                if isdir(args.config) else parse(Config, conf_path=args.config)
-        except FileNotFoundError as ex:
-            raise ConfigError("No configuration!") from ex
+        config = _load_config(args.config, args.config_cache)
     if args.debug:
         config.debug = True
+    if config.output.sink not in ("stdout", "http"):
+        raise ConfigError(f"Unknown output sink {config.output.sink!r}")
+    output_url = urlsplit(config.output.url)
+    if output_url.scheme not in ("http", "https") or not output_url.netloc:
+        raise ConfigError(f"Output url {config.output.url!r} must be an "
+                          "http:// or https:// URL with a host")
+    if config.output.batch_size <= 0:
+        raise ConfigError("Output batch_size must be greater than 0")
+    if config.output.flush_interval <= 0:
+        raise ConfigError("Output flush_interval must be greater than 0")
+    if config.output.buffer_size < config.output.batch_size:
+        raise ConfigError("Output buffer_size must be at least batch_size")
+    if config.output.timeout <= 0:
+        raise ConfigError("Output timeout must be greater than 0")
+    if not 1 <= config.profiling.tracemalloc_frames <= 65535:
+        raise ConfigError("Profiling tracemalloc_frames must be between 1 "
+                          "and 65535")
 
-    log_handler = logging.StreamHandler(stderr)
-    log_handler.setFormatter(
-        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"),
-    )
-    _logger.addHandler(log_handler)
     _logger.setLevel(logging.DEBUG if config.debug else logging.INFO)
 
     app = TelegrafApplication(config)
     app.register_devices(*config.device)
 
-    run()
+    if config.profiling.enabled:
+        print_job_pid = app.influx_lpr.print_job.pid
+        if print_job_pid is None:
+            _logger.warning("Output process is not running, profiling only "
+                            "the main process")
+        Profiler(config.profiling, "app",
+                 (print_job_pid,) if print_job_pid is not None else ()) \
+            .install()
+        run(sigusr1=None)
+    else:
+        run()
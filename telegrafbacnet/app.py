@@ -19,7 +19,8 @@ from bacpypes.pdu import Address
 from bacpypes.primitivedata import ObjectIdentifier, Unsigned
 
 from .config import Config, DeviceConfig, DiscoveryGroupConfig, ObjectConfig
-from .influx import InfluxLPR
+from .influx import InfluxHTTPWriter, InfluxLPR
+from .profiling import timed
 from .tasks import (
     DeviceReadTask,
     DiscoveryTask,
@@ -45,7 +46,11 @@ class TelegrafApplication(BIPSimpleApplication):
         super().__init__(local_device, config.address)
         self.config = config
         self.devices: dict[Address, DeviceConfig] = {}
-        self.influx_lpr = InfluxLPR()
+        self.influx_lpr = InfluxHTTPWriter(self.config.output,
+                                           self.config.profiling) \
+            if self.config.output.sink == "http" \
+            else InfluxLPR(self.config.profiling)
+        self.influx_lpr.start()
         if self.config.discovery.enabled:
             DiscoveryTask(self, self.config.discovery).install_task()
 
@@ -130,6 +135,7 @@ class TelegrafApplication(BIPSimpleApplication):
                                         element.propertyIdentifier, value,
                                         element.propertyArrayIndex)
 
+    @timed("TelegrafApplication._process_response_iocb")
     def _process_response_iocb(self, iocb: IOCB, **_: Any) -> None:
         if iocb.ioError:
             _logger.error("Response IOCB error: %r", iocb.ioError)
@@ -147,6 +153,7 @@ class TelegrafApplication(BIPSimpleApplication):
         else:
             _logger.debug("Unhandled response type %r", type(apdu))
 
+    @timed("TelegrafApplication.do_UnconfirmedCOVNotificationRequest")
     def do_UnconfirmedCOVNotificationRequest(
             self, apdu: ConfirmedCOVNotificationRequest,
     ) -> None:
@@ -0,0 +1,151 @@
+from hashlib import sha256
+from importlib.metadata import PackageNotFoundError, version
+import logging
+from os import fdopen, fstat, getuid, listdir, replace, stat, unlink
+from os.path import dirname, isdir, isfile, join
+import pickle
+from stat import S_IWGRP, S_IWOTH
+from sys import modules
+from tempfile import mkstemp
+from typing import NamedTuple
+
+from .config import Config
+
+
+CACHE_VERSION = 2
+
+_logger = logging.getLogger(__name__)
+
+
+class SourceFingerprint(NamedTuple):
+    """Identifies the state of a single config source file"""
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as source:
+        return sha256(source.read()).hexdigest()
+
+
+def _schema_digest() -> str:
+    """
+    Returns a digest of the code the cached config depends on, the module
+    defining the config classes and versions of the libraries providing its
+    field types
+    """
+    schema = sha256()
+    config_file = modules[Config.__module__].__file__
+    assert config_file is not None
+    with open(config_file, "rb") as source:
+        schema.update(source.read())
+    for package in ("bacpypes", "tomlconfig"):
+        try:
+            schema.update(f"{package}=={version(package)}".encode())
+        except PackageNotFoundError:
+            pass
+    return schema.hexdigest()
+
+
+def config_sources(config_path: str) -> list[str]:
+    """
+    Returns the files the config is loaded from, the file itself or all files
+    in the directory in alphabetical order
+    """
+    if not isdir(config_path):
+        return [config_path]
+    return [join(config_path, name) for name in sorted(listdir(config_path))
+            if isfile(join(config_path, name))]
+
+
+def fingerprint_sources(sources: list[str]) -> list[SourceFingerprint]:
+    """Returns fingerprints of the config source files"""
+    fingerprints = []
+    for path in sources:
+        path_stat = stat(path)
+        fingerprints.append(SourceFingerprint(path, path_stat.st_mtime_ns,
+                                              path_stat.st_size,
+                                              _digest(path)))
+    return fingerprints
+
+
+def _is_fresh(fingerprint: SourceFingerprint) -> bool:
+    try:
+        path_stat = stat(fingerprint.path)
+    except OSError:
+        return False
+    if path_stat.st_size != fingerprint.size:
+        return False
+    if path_stat.st_mtime_ns == fingerprint.mtime_ns:
+        return True
+    return _digest(fingerprint.path) == fingerprint.digest
+
+
+def load_config_cache(cache_path: str, sources: list[str]) -> Config | None:
+    """
+    Returns the config stored in the cache or None if the cache is missing,
+    unreadable, not owned by the current user, writable by others or any of
+    the source files changed since it was stored
+    """
+    try:
+        with open(cache_path, "rb") as cache:
+            cache_stat = fstat(cache.fileno())
+            if cache_stat.st_uid != getuid() \
+                    or cache_stat.st_mode & (S_IWGRP | S_IWOTH):
+                _logger.warning("Ignoring config cache %r, it is not owned "
+                                "by the current user or is writable by "
+                                "others", cache_path)
+                return None
+            header = pickle.load(cache)
+            if header[0] != CACHE_VERSION:
+                _logger.debug("Config cache version %r differs", header[0])
+                return None
+            _, schema, fingerprints = header
+            if schema != _schema_digest():
+                _logger.debug("Config cache %r was stored by different code",
+                              cache_path)
+                return None
+            if [fingerprint.path for fingerprint in fingerprints] \
+                    != sources \
+                    or not all(_is_fresh(fingerprint)
+                               for fingerprint in fingerprints):
+                _logger.debug("Config cache %r is stale", cache_path)
+                return None
+            config = pickle.load(cache)
+    except FileNotFoundError:
+        return None
+    except Exception as ex:  # pylint: disable=broad-except
+        _logger.warning("Cannot load config cache %r: %r", cache_path, ex)
+        return None
+    if not isinstance(config, Config):
+        return None
+    return config
+
+
+def store_config_cache(cache_path: str,
+                       fingerprints: list[SourceFingerprint],
+                       config: Config) -> None:
+    """
+    Stores the config in the cache with fingerprints of its source files
+    taken before it was parsed
+    """
+    try:
+        tmp_fd, tmp_path = mkstemp(dir=dirname(cache_path) or ".",
+                                   prefix=".config-cache-")
+    except OSError as ex:
+        _logger.warning("Cannot store config cache %r: %r", cache_path, ex)
+        return
+    try:
+        with fdopen(tmp_fd, "wb") as cache:
+            pickle.dump((CACHE_VERSION, _schema_digest(), fingerprints),
+                        cache, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(config, cache, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(tmp_path, cache_path)
+    except OSError as ex:
+        _logger.warning("Cannot store config cache %r: %r", cache_path, ex)
+        try:
+            unlink(tmp_path)
+        except OSError:
+            pass
@@ -82,6 +82,29 @@ class DiscoveryConfig:
         return None
 
 
+@configclass
+class ProfilingConfig:
+    """Class representing on-demand profiling config"""
+    enabled: bool = False
+    output_dir: str = "/tmp/telegrafbacnet"
+    tracemalloc_frames: int = 1
+
+
+@configclass
+class OutputConfig:
+    """Class representing measurement output config"""
+    sink: str = "stdout"
+    url: str = "http://localhost:8086"
+    org: str = ""
+    bucket: str = ""
+    token: str = ""
+    gzip: bool = True
+    batch_size: int = 5000
+    flush_interval: float = 1.0
+    buffer_size: int = 100000
+    timeout: float = 5.0
+
+
 @configclass
 class Config:
     """Class representing main application config"""
@@ -98,4 +121,6 @@ class Config:
     read_interval: int = 5
     cov_lifetime: int = 5 * 60
     discovery: DiscoveryConfig = field(default_factory=DiscoveryConfig)
+    output: OutputConfig = field(default_factory=OutputConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
     device: list[DeviceConfig] = field(default_factory=list)
@@ -1,6 +1,46 @@
+from collections import deque
+from gzip import compress
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from itertools import islice
+import logging
 from multiprocessing import Process, Queue
-from time import time_ns
-from typing import Any
+from queue import Empty
+import signal
+from time import monotonic, time_ns
+from typing import Any, Iterable
+from urllib.parse import urlencode, urlsplit
+
+from .config import OutputConfig, ProfilingConfig
+from .profiling import Profiler, timed
+
+
+_KEY_ESCAPES = str.maketrans({
+    ",": "\\,",
+    "=": "\\=",
+    " ": "\\ ",
+    "\n": "\\n",
+})
+_STRING_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\"": "\\\"",
+    "\n": "\\n",
+})
+
+_logger = logging.getLogger(__name__)
+
+
+def _escape_key(key: str) -> str:
+    """Escapes a tag key, tag value or field key for Line Protocol"""
+    return key.translate(_KEY_ESCAPES)
+
+
+def _format_field_value(value: Any) -> str:
+    """Formats a field value for Line Protocol, quoting strings"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return f"\"{str(value).translate(_STRING_ESCAPES)}\""
 
 
 class InfluxLine:
@@ -16,9 +56,13 @@ class InfluxLine:
 class InfluxLPR:
     """Class for printing measurements in InfluxDB Line Protocol format"""
 
-    def __init__(self) -> None:
+    def __init__(self, profiling: ProfilingConfig | None = None) -> None:
+        self.profiling = profiling
         self.queue: Queue[InfluxLine] = Queue()
         self.print_job = Process(target=self._print_task)
+
+    def start(self) -> None:
+        """Starts the process printing the queued measurements"""
         self.print_job.start()
 
     def print(self, key: str, value: Any, *tags: tuple[str, Any]) -> None:
@@ -26,22 +70,165 @@ class InfluxLPR:
         self.queue.put(InfluxLine(key, value, *tags))
 
     def _print_task(self) -> None:
+        if self.profiling is not None and self.profiling.enabled:
+            Profiler(self.profiling, "influx", child=True).install()
+        signal.signal(signal.SIGTERM, self._terminate)
         try:
-            while True:
-                line = self.queue.get(block=True)
-                self._print_influx_line(line)
-        except KeyboardInterrupt:
+            self._output_loop()
+        except (KeyboardInterrupt, SystemExit):
             pass
+        finally:
+            self._close()
+
+    @staticmethod
+    def _terminate(*_: Any) -> None:
+        raise SystemExit()
+
+    def _close(self) -> None:
+        """Called when the output loop exits"""
+
+    def _output_loop(self) -> None:
+        while True:
+            line = self.queue.get(block=True)
+            for formatted in self._format_influx_line(line):
+                print(formatted)
 
     @staticmethod
-    def _print_influx_line(line: InfluxLine) -> None:
-        tags_str = ",".join(f"{tagKey}={tagValue}"
-                            for tagKey, tagValue in line.tags)
+    @timed("InfluxLPR._format_influx_line")
+    def _format_influx_line(line: InfluxLine) -> list[str]:
+        tags_str = ",".join(
+            f"{_escape_key(str(tagKey))}={_escape_key(str(tagValue))}"
+            for tagKey, tagValue in line.tags if str(tagValue) != ""
+        )
         tags_str = f",{tags_str}" if tags_str else tags_str
+        key = _escape_key(str(line.key))
         value = line.value
         if isinstance(value, list):
-            for index, inner in enumerate(value):
-                print(f"bacnet{tags_str},index={index} "
-                      f"{line.key}={inner} {line.timestamp}")
+            return [f"bacnet{tags_str},index={index} "
+                    f"{key}={_format_field_value(inner)} {line.timestamp}"
+                    for index, inner in enumerate(value)]
+        return [f"bacnet{tags_str} {key}={_format_field_value(value)} "
+                f"{line.timestamp}"]
+
+
+class InfluxHTTPWriter(InfluxLPR):
+    """
+    Class for writing measurements in InfluxDB Line Protocol format directly
+    to an InfluxDB v2 compatible write endpoint
+    """
+
+    def __init__(self, config: OutputConfig,
+                 profiling: ProfilingConfig | None = None) -> None:
+        self.config = config
+        url = urlsplit(config.url)
+        self.connection_class = HTTPSConnection if url.scheme == "https" \
+            else HTTPConnection
+        self.host = url.netloc
+        self.path = f"{url.path.rstrip('/')}/api/v2/write?" + urlencode({
+            "org": config.org,
+            "bucket": config.bucket,
+            "precision": "ns",
+        })
+        self.headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if config.token:
+            self.headers["Authorization"] = f"Token {config.token}"
+        if config.gzip:
+            self.headers["Content-Encoding"] = "gzip"
+        self.connection: HTTPConnection | None = None
+        self.buffer: deque[str] = deque()
+        self.dropped = 0
+        super().__init__(profiling)
+
+    def _output_loop(self) -> None:
+        healthy = True
+        next_flush = monotonic() + self.config.flush_interval
+        while True:
+            try:
+                line = self.queue.get(
+                    timeout=max(next_flush - monotonic(), 0))
+                self._buffer_lines(self._format_influx_line(line))
+            except Empty:
+                pass
+            if monotonic() >= next_flush or \
+                    (healthy and len(self.buffer) >= self.config.batch_size):
+                if self.dropped:
+                    _logger.warning("Output buffer full, dropped %d oldest "
+                                    "lines", self.dropped)
+                    self.dropped = 0
+                healthy = self._flush()
+                next_flush = monotonic() + self.config.flush_interval
+
+    def _buffer_lines(self, lines: list[str]) -> None:
+        overflow = len(self.buffer) + len(lines) - self.config.buffer_size
+        if overflow > 0:
+            self.dropped += overflow
+            if len(lines) > self.config.buffer_size:
+                lines = lines[len(lines) - self.config.buffer_size:]
+            for _ in range(len(self.buffer) + len(lines)
+                           - self.config.buffer_size):
+                self.buffer.popleft()
+        self.buffer.extend(lines)
+
+    def _close(self) -> None:
+        deadline = monotonic() + self.config.timeout
+        try:
+            while monotonic() < deadline:
+                line = self.queue.get(timeout=0.1)
+                self._buffer_lines(self._format_influx_line(line))
+        except Empty:
+            pass
+        if self.buffer and not self._flush(deadline):
+            _logger.error("Dropping %d unwritten lines on shutdown",
+                          len(self.buffer))
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _flush(self, deadline: float | None = None) -> bool:
+        """
+        Writes buffered lines in batches, returns False if the write failed
+        or the deadline passed and the remaining lines should be retried
+        later
+        """
+        while self.buffer:
+            if deadline is not None and monotonic() >= deadline:
+                return False
+            batch = list(islice(self.buffer, self.config.batch_size))
+            if not self._write(batch):
+                return False
+            for _ in range(len(batch)):
+                self.buffer.popleft()
+        return True
+
+    def _write(self, batch: Iterable[str]) -> bool:
+        body = "\n".join(batch).encode()
+        if self.config.gzip:
+            body = compress(body, compresslevel=6)
+        # Retry once on a fresh connection if a kept-alive one was closed
+        for _ in range(2):
+            try:
+                if self.connection is None:
+                    self.connection = self.connection_class(
+                        self.host, timeout=self.config.timeout)
+                self.connection.request("POST", self.path, body,
+                                        self.headers)
+                response = self.connection.getresponse()
+                response_body = response.read()
+                break
+            except (OSError, HTTPException) as ex:
+                _logger.error("Failed to write to %r: %r", self.config.url,
+                              ex)
+                if self.connection is not None:
+                    self.connection.close()
+                self.connection = None
         else:
-            print(f"bacnet{tags_str} {line.key}={line.value} {line.timestamp}")
+            return False
+
+        if response.status < 300:
+            return True
+        _logger.error("Write to %r failed with %d: %r", self.config.url,
+                      response.status, response_body[:1000])
+        if response.status in (408, 429) or response.status >= 500:
+            return False
+        _logger.error("Dropping batch rejected by the server")
+        return True
@@ -0,0 +1,186 @@
+from cProfile import Profile
+from dataclasses import dataclass
+from functools import wraps
+import logging
+from os import getpid, kill, makedirs
+from os.path import join
+import signal
+from time import perf_counter_ns, strftime
+import tracemalloc
+from typing import Any, Callable, TypeVar
+
+from .config import ProfilingConfig
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+SIGNALS = (signal.SIGUSR1, signal.SIGUSR2)
+CHILD_SIGNALS = (signal.SIGRTMIN + 1, signal.SIGRTMIN + 2) \
+    if hasattr(signal, "SIGRTMIN") else SIGNALS
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HandlerTiming:
+    """Class representing accumulated timing of a single handler"""
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, duration_ns: int) -> None:
+        """Records a single handler call"""
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+
+
+class HandlerTimings:
+    """Class collecting per-handler timings while enabled"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.timings: dict[str, HandlerTiming] = {}
+
+    def reset(self) -> None:
+        """Forgets all collected timings"""
+        self.timings = {}
+
+    def add(self, name: str, duration_ns: int) -> None:
+        """Records a single call of the handler name"""
+        if name not in self.timings:
+            self.timings[name] = HandlerTiming()
+        self.timings[name].add(duration_ns)
+
+    def format(self) -> str:
+        """Returns collected timings as a table, slowest handlers first"""
+        lines = [f"{'handler':<50} {'calls':>10} {'total ms':>12} "
+                 f"{'mean us':>10} {'max us':>10}"]
+        for name, timing in sorted(self.timings.items(),
+                                   key=lambda item: item[1].total_ns,
+                                   reverse=True):
+            lines.append(f"{name:<50} {timing.count:>10} "
+                         f"{timing.total_ns / 1e6:>12.3f} "
+                         f"{timing.total_ns / timing.count / 1e3:>10.1f} "
+                         f"{timing.max_ns / 1e3:>10.1f}")
+        return "\n".join(lines) + "\n"
+
+
+handler_timings = HandlerTimings()
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorator recording the duration of the decorated handler while
+    handler timings are enabled
+    """
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not handler_timings.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                handler_timings.add(name, perf_counter_ns() - start)
+        return wrapper  # type: ignore
+    return decorator
+
+
+class Profiler:
+    """
+    Class for on-demand profiling triggered by signals
+
+    SIGUSR1 toggles a cProfile session together with handler timings,
+    SIGUSR2 toggles tracemalloc tracing, a snapshot is taken when it is
+    toggled off. Results are written to the configured output directory.
+    The main process forwards the signals to its children as CHILD_SIGNALS,
+    children ignore SIGUSR1 and SIGUSR2, so a signal sent to the whole
+    process group or cgroup toggles each process only once.
+    """
+
+    def __init__(self, config: ProfilingConfig, name: str,
+                 children: tuple[int, ...] = (), child: bool = False) \
+            -> None:
+        self.config = config
+        self.name = name
+        self.children = children
+        self.child = child
+        self.profile: Profile | None = None
+        self.sessions = 0
+
+    def install(self) -> None:
+        """Installs the signal handlers"""
+        try:
+            makedirs(self.config.output_dir, exist_ok=True)
+        except OSError as ex:
+            _logger.error("Cannot create profiling output directory: %r", ex)
+        profile_signal, tracemalloc_signal = \
+            CHILD_SIGNALS if self.child else SIGNALS
+        if self.child and CHILD_SIGNALS != SIGNALS:
+            for signum in SIGNALS:
+                signal.signal(signum, signal.SIG_IGN)
+        signal.signal(profile_signal, self._toggle_profile)
+        signal.signal(tracemalloc_signal, self._toggle_tracemalloc)
+        _logger.debug("Profiler %r installed, output in %r", self.name,
+                      self.config.output_dir)
+
+    def _output_stem(self) -> str:
+        self.sessions += 1
+        return join(self.config.output_dir,
+                    f"{self.name}-{getpid()}-{strftime('%Y%m%d-%H%M%S')}"
+                    f"-{self.sessions}")
+
+    def _forward(self, signum: int) -> None:
+        for pid in self.children:
+            try:
+                kill(pid, signum)
+            except ProcessLookupError:
+                _logger.warning("Cannot forward signal to %r, no such process",
+                                pid)
+
+    def _toggle_profile(self, *_: Any) -> None:
+        try:
+            self._forward(CHILD_SIGNALS[0])
+            if self.profile is None:
+                self._start_profile()
+            else:
+                profile, self.profile = self.profile, None
+                self._stop_profile(profile)
+        except Exception:  # pylint: disable=broad-except
+            _logger.exception("Failed to toggle profiling")
+
+    def _start_profile(self) -> None:
+        handler_timings.reset()
+        handler_timings.enabled = True
+        self.profile = Profile()
+        self.profile.enable()
+        _logger.info("Profiling started")
+
+    def _stop_profile(self, profile: Profile) -> None:
+        profile.disable()
+        handler_timings.enabled = False
+        output_stem = self._output_stem()
+        profile_path = f"{output_stem}.prof"
+        timings_path = f"{output_stem}.timings"
+        profile.dump_stats(profile_path)
+        with open(timings_path, "w", encoding="utf-8") as timings_file:
+            timings_file.write(handler_timings.format())
+        _logger.info("Profiling stopped, written %r and %r", profile_path,
+                     timings_path)
+
+    def _toggle_tracemalloc(self, *_: Any) -> None:
+        try:
+            self._forward(CHILD_SIGNALS[1])
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.config.tracemalloc_frames)
+                _logger.info("Memory tracing started")
+                return
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            snapshot_path = f"{self._output_stem()}.snapshot"
+            snapshot.dump(snapshot_path)
+            _logger.info("Memory tracing stopped, written %r", snapshot_path)
+        except Exception:  # pylint: disable=broad-except
+            _logger.exception("Failed to toggle memory tracing")
@@ -0,0 +1,97 @@
+from os import mkdir, stat, unlink, utime
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+
+from telegrafbacnet import _load_config, cache
+from telegrafbacnet.cache import (
+    config_sources,
+    fingerprint_sources,
+    load_config_cache,
+    store_config_cache,
+)
+from telegrafbacnet.config import Config
+
+
+class ConfigCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.conf_d = join(self.tmp_dir.name, "conf.d")
+        self.cache_path = join(self.tmp_dir.name, "config.cache")
+        self.config_path = join(self.tmp_dir.name, "config.toml")
+        self._write(self.config_path, "device_name = \"A\"\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        with open(path, "w", encoding="utf-8") as config_file:
+            config_file.write(content)
+
+    def _store(self, config_path: str) -> None:
+        config = Config()
+        config.device_name = "cached"
+        store_config_cache(self.cache_path,
+                           fingerprint_sources(config_sources(config_path)),
+                           config)
+
+    def _load(self, config_path: str) -> Config | None:
+        return load_config_cache(self.cache_path, config_sources(config_path))
+
+    def _bump_mtime(self, path: str) -> None:
+        mtime_ns = stat(path).st_mtime_ns + 1_000_000_000
+        utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_hit(self) -> None:
+        self._store(self.config_path)
+        config = self._load(self.config_path)
+        assert config is not None
+        self.assertEqual(config.device_name, "cached")
+
+    def test_miss_on_changed_content(self) -> None:
+        self._store(self.config_path)
+        self._write(self.config_path, "device_name = \"B\"\n")
+        self._bump_mtime(self.config_path)
+        self.assertIsNone(self._load(self.config_path))
+
+    def test_hit_on_changed_mtime_only(self) -> None:
+        self._store(self.config_path)
+        self._bump_mtime(self.config_path)
+        self.assertIsNotNone(self._load(self.config_path))
+
+    def test_miss_on_added_and_removed_file(self) -> None:
+        mkdir(self.conf_d)
+        self._write(join(self.conf_d, "10-base.toml"), "debug = false\n")
+        self._store(self.conf_d)
+        self.assertIsNotNone(self._load(self.conf_d))
+        self._write(join(self.conf_d, "20-extra.toml"), "debug = true\n")
+        self.assertIsNone(self._load(self.conf_d))
+        self._store(self.conf_d)
+        unlink(join(self.conf_d, "10-base.toml"))
+        self.assertIsNone(self._load(self.conf_d))
+
+    def test_miss_on_different_version(self) -> None:
+        self._store(self.config_path)
+        with patch.object(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1):
+            self.assertIsNone(self._load(self.config_path))
+
+    def test_miss_on_different_schema(self) -> None:
+        self._store(self.config_path)
+        with patch.object(cache, "_schema_digest", return_value="other"):
+            self.assertIsNone(self._load(self.config_path))
+
+    def test_corrupted_cache_is_rewritten(self) -> None:
+        with open(self.cache_path, "wb") as cache_file:
+            cache_file.write(b"not a pickle")
+        self.assertIsNone(self._load(self.config_path))
+        config = _load_config(self.config_path, self.cache_path)
+        self.assertEqual(config.device_name, "A")
+        cached = self._load(self.config_path)
+        assert cached is not None
+        self.assertEqual(cached.device_name, "A")
+
+
+if __name__ == "__main__":
+    unittest.main()
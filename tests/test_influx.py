@@ -0,0 +1,134 @@
+from gzip import decompress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import unittest
+
+from telegrafbacnet.config import OutputConfig
+from telegrafbacnet.influx import InfluxHTTPWriter, InfluxLine, InfluxLPR
+
+
+class _WriteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_WriteServer"
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.client_address, self.path,
+                                     dict(self.headers), body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 204
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+class _WriteServer(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _WriteHandler)
+        self.requests: list[tuple[tuple[str, int], str, dict[str, str],
+                                  bytes]] = []
+        self.statuses: list[int] = []
+
+
+class InfluxHTTPWriterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = _WriteServer()
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        config = OutputConfig()
+        config.sink = "http"
+        config.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        config.org = "org"
+        config.bucket = "bucket"
+        config.token = "token"
+        config.batch_size = 2
+        config.buffer_size = 5
+        self.writer = InfluxHTTPWriter(config)
+
+    def tearDown(self) -> None:
+        if self.writer.connection is not None:
+            self.writer.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _bodies(self) -> list[str]:
+        return [decompress(body).decode()
+                for _, _, _, body in self.server.requests]
+
+    def test_gzip_batches_over_single_connection(self) -> None:
+        self.writer._buffer_lines(["a", "b", "c", "d", "e"])
+        self.assertTrue(self.writer._flush())
+        self.assertEqual(self._bodies(), ["a\nb", "c\nd", "e"])
+        self.assertEqual(
+            len({client for client, _, _, _ in self.server.requests}), 1)
+        _, path, headers, _ = self.server.requests[0]
+        self.assertEqual(path, "/api/v2/write?org=org&bucket=bucket"
+                         "&precision=ns")
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Authorization"], "Token token")
+
+    def test_retry_after_server_error(self) -> None:
+        self.server.statuses = [503]
+        self.writer._buffer_lines(["a", "b"])
+        self.assertFalse(self.writer._flush())
+        self.assertEqual(list(self.writer.buffer), ["a", "b"])
+        self.assertTrue(self.writer._flush())
+        self.assertEqual(list(self.writer.buffer), [])
+        self.assertEqual(self._bodies(), ["a\nb", "a\nb"])
+
+    def test_drop_after_client_error(self) -> None:
+        self.server.statuses = [400]
+        self.writer._buffer_lines(["a", "b", "c"])
+        self.assertTrue(self.writer._flush())
+        self.assertEqual(list(self.writer.buffer), [])
+        self.assertEqual(self._bodies(), ["a\nb", "c"])
+
+    def test_flush_on_close(self) -> None:
+        self.writer._buffer_lines(["a", "b", "c"])
+        self.writer.print("presentValue", 1)
+        self.writer._close()
+        self.assertEqual(list(self.writer.buffer), [])
+        bodies = self._bodies()
+        self.assertEqual(bodies[0], "a\nb")
+        self.assertTrue(bodies[1].startswith("c\nbacnet presentValue=1 "))
+        self.assertIsNone(self.writer.connection)
+
+    def test_close_is_bounded_without_server(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.writer.config.timeout = 0.5
+        self.writer._buffer_lines(["a"])
+        self.writer._close()
+        self.assertEqual(list(self.writer.buffer), ["a"])
+
+    def test_buffer_limit(self) -> None:
+        self.writer._buffer_lines(["a", "b", "c", "d"])
+        self.writer._buffer_lines(["e", "f", "g"])
+        self.assertEqual(list(self.writer.buffer), ["c", "d", "e", "f", "g"])
+        self.writer._buffer_lines([str(index) for index in range(7)])
+        self.assertEqual(list(self.writer.buffer), ["2", "3", "4", "5", "6"])
+        self.assertEqual(self.writer.dropped, 9)
+
+
+class InfluxLPRFormatTest(unittest.TestCase):
+    def test_escaping(self) -> None:
+        line = InfluxLine("presentValue", "say \"hi\"",
+                          ("deviceName", "My Device"), ("a,b", "c=d"))
+        line.timestamp = 1
+        self.assertEqual(
+            InfluxLPR._format_influx_line(line),
+            ["bacnet,deviceName=My\\ Device,a\\,b=c\\=d "
+             "presentValue=\"say \\\"hi\\\"\" 1"],
+        )
+
+    def test_list_and_bool(self) -> None:
+        line = InfluxLine("statusFlags", [True, 0])
+        line.timestamp = 1
+        self.assertEqual(InfluxLPR._format_influx_line(line),
+                         ["bacnet,index=0 statusFlags=true 1",
+                          "bacnet,index=1 statusFlags=0 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
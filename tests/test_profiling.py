@@ -0,0 +1,88 @@
+from os import listdir, makedirs
+from os.path import join
+from tempfile import TemporaryDirectory
+import tracemalloc
+import unittest
+
+from telegrafbacnet.config import ProfilingConfig
+from telegrafbacnet.profiling import (
+    HandlerTimings,
+    Profiler,
+    handler_timings,
+    timed,
+)
+
+
+@timed("handler")
+def _handler(value: int) -> int:
+    return value + 1
+
+
+class TimedTest(unittest.TestCase):
+    def tearDown(self) -> None:
+        handler_timings.enabled = False
+        handler_timings.reset()
+
+    def test_disabled(self) -> None:
+        self.assertEqual(_handler(1), 2)
+        self.assertEqual(handler_timings.timings, {})
+
+    def test_enabled(self) -> None:
+        handler_timings.enabled = True
+        _handler(1)
+        _handler(2)
+        self.assertEqual(handler_timings.timings["handler"].count, 2)
+
+    def test_format_order(self) -> None:
+        timings = HandlerTimings()
+        timings.add("fast", 1000)
+        timings.add("slow", 5000)
+        timings.add("fast", 1000)
+        lines = timings.format().splitlines()
+        self.assertTrue(lines[0].startswith("handler"))
+        self.assertEqual([line.split()[0] for line in lines[1:]],
+                         ["slow", "fast"])
+        self.assertEqual(lines[2].split()[1], "2")
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.output_dir = TemporaryDirectory()
+        config = ProfilingConfig()
+        config.enabled = True
+        config.output_dir = join(self.output_dir.name, "profiles")
+        makedirs(config.output_dir)
+        self.profiler = Profiler(config, "test")
+
+    def tearDown(self) -> None:
+        handler_timings.enabled = False
+        handler_timings.reset()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.output_dir.cleanup()
+
+    def _files(self, suffix: str) -> list[str]:
+        return [name for name in listdir(self.profiler.config.output_dir)
+                if name.endswith(suffix)]
+
+    def test_profile_sessions(self) -> None:
+        for _ in range(2):
+            self.profiler._toggle_profile()
+            self.assertTrue(handler_timings.enabled)
+            _handler(1)
+            self.profiler._toggle_profile()
+            self.assertFalse(handler_timings.enabled)
+        self.assertEqual(len(self._files(".prof")), 2)
+        self.assertEqual(len(self._files(".timings")), 2)
+
+    def test_tracemalloc_sessions(self) -> None:
+        for _ in range(2):
+            self.profiler._toggle_tracemalloc()
+            self.assertTrue(tracemalloc.is_tracing())
+            self.profiler._toggle_tracemalloc()
+            self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(self._files(".snapshot")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()